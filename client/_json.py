@@ -0,0 +1,23 @@
+"""
+JSON encoding helpers, using orjson when it is installed
+"""
+
+import json
+from typing import Any
+
+try:
+    # Optional: orjson encodes/decodes in a single C call
+    import orjson
+except ImportError:
+    orjson = None
+
+
+if orjson is not None:
+    def dumps(data: Any) -> str:
+        """Serialize data to a JSON text string"""
+        return orjson.dumps(data).decode()
+
+    loads = orjson.loads
+else:
+    dumps = json.dumps
+    loads = json.loads
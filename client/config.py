@@ -3,9 +3,25 @@ Client configuration management
 """
 
 import os
+import functools
 import json
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Tuple
+
+from ._json import loads as _loads
+
+
+@functools.lru_cache(maxsize=8)
+def _resolve_paths(home: Path) -> Tuple[Path, Path]:
+    """
+    Resolve (config_dir, config_file) for a home directory
+
+    The config directory is created on first resolution only, so repeated
+    ClientConfig() calls don't pay for a mkdir each time.
+    """
+    config_dir = home / ".terminal-chat"
+    config_dir.mkdir(parents=True, exist_ok=True)
+    return config_dir, config_dir / "config.json"
 
 
 class ClientConfig:
@@ -20,30 +36,36 @@ class ClientConfig:
         "message_history_limit": 50,
     }
 
-    def __init__(self):
-        self.config_dir = Path.home() / ".terminal-chat"
-        self.config_file = self.config_dir / "config.json"
+    def __init__(self, config_path: Optional[str] = None):
+        if config_path is None:
+            self.config_dir, self.config_file = _resolve_paths(Path.home())
+        else:
+            self.config_file = Path(config_path)
+            self.config_dir = self.config_file.parent
+            self.config_dir.mkdir(parents=True, exist_ok=True)
         self.config = self.load_config()
 
     def load_config(self) -> Dict[str, Any]:
         """Load configuration from file or create default"""
-        # Create config directory if it doesn't exist
-        self.config_dir.mkdir(parents=True, exist_ok=True)
-
         # Load existing config or create default
-        if self.config_file.exists():
-            try:
-                with open(self.config_file, 'r') as f:
-                    config = json.load(f)
-                    # Merge with defaults (in case new settings were added)
-                    return {**self.DEFAULT_CONFIG, **config}
-            except Exception as e:
-                print(f"Warning: Failed to load config file: {e}")
-                return self.DEFAULT_CONFIG.copy()
-        else:
+        try:
+            data = self.config_file.read_bytes()
+        except FileNotFoundError:
             # Create default config file
             self.save_config(self.DEFAULT_CONFIG)
             return self.DEFAULT_CONFIG.copy()
+        except OSError as e:
+            # Unreadable (e.g. a directory or no permission): use the defaults
+            print(f"Warning: Failed to load config file: {e}")
+            return self.DEFAULT_CONFIG.copy()
+
+        try:
+            config = _loads(data)
+            # Merge with defaults (in case new settings were added)
+            return {**self.DEFAULT_CONFIG, **config}
+        except Exception as e:
+            print(f"Warning: Failed to load config file: {e}")
+            return self.DEFAULT_CONFIG.copy()
 
     def save_config(self, config: Dict[str, Any] = None):
         """Save configuration to file"""
@@ -63,17 +85,21 @@ class ClientConfig:
     def set(self, key: str, value: Any):
         """Set a configuration value and save"""
         self.config[key] = value
+        if key == "server_url":
+            # Drop memoized URLs so they are derived from the new value
+            self.__dict__.pop("server_url", None)
+            self.__dict__.pop("ws_url", None)
         self.save_config()
 
-    @property
+    @functools.cached_property
     def server_url(self) -> str:
-        """Get server URL from config or environment variable"""
+        """Get server URL from config or environment variable (resolved once)"""
         # Environment variable takes precedence
         return os.getenv("CHAT_SERVER_URL", self.config.get("server_url")).rstrip('/')
 
-    @property
+    @functools.cached_property
     def ws_url(self) -> str:
-        """Get WebSocket URL"""
+        """Get WebSocket URL (resolved once)"""
         url = self.server_url
         return url.replace('http://', 'ws://').replace('https://', 'wss://')
 
@@ -88,3 +114,10 @@ def get_config() -> ClientConfig:
     if _config is None:
         _config = ClientConfig()
     return _config
+
+
+def reset_config():
+    """Drop the global config instance and cached paths"""
+    global _config
+    _config = None
+    _resolve_paths.cache_clear()
@@ -3,16 +3,30 @@ WebSocket client connection handler with auto-reconnection
 """
 
 import asyncio
+import collections
 import websockets
-from typing import Callable, Optional, Dict, Any
+from typing import Callable, Optional, Any, Mapping
 import json
 from datetime import datetime
 
+from ._json import dumps as _dumps, loads as _loads
+
+
+# Frames with fixed content are encoded once at import time
+PONG_FRAME = _dumps({"type": "pong"})
+TYPING_FRAMES = {
+    True: _dumps({"type": "typing", "is_typing": True}),
+    False: _dumps({"type": "typing", "is_typing": False}),
+}
+
 
 class ChatConnection:
     """Manages WebSocket connection to the chat server with auto-reconnection"""
 
-    def __init__(self, server_url: str, user_id: int, token: str):
+    # Oldest offline messages are dropped beyond this many
+    MAX_QUEUED_MESSAGES = 1000
+
+    def __init__(self, server_url: str, user_id: int, token: str, max_reconnect_delay: int = 60):
         self.server_url = server_url
         self.user_id = user_id
         self.token = token
@@ -21,9 +35,11 @@ class ChatConnection:
         self.connected = False
         self.message_callback: Optional[Callable] = None
         self.status_callback: Optional[Callable] = None
-        self.reconnect_delay = 1  # Initial reconnect delay in seconds
-        self.max_reconnect_delay = 60
-        self.message_queue = []  # Queue messages when offline
+        # Reconnect delays in seconds, doubling up to max_reconnect_delay
+        self._attempt = 0
+        self.max_reconnect_delay = max_reconnect_delay
+        self.reconnect_delay = self._backoff[0]  # Initial reconnect delay in seconds
+        self.message_queue = collections.deque(maxlen=self.MAX_QUEUED_MESSAGES)  # Queue messages when offline
         self.receive_task: Optional[asyncio.Task] = None
 
     async def connect(self):
@@ -33,7 +49,8 @@ class ChatConnection:
             self.websocket = await websockets.connect(url)
             self.connected = True
             self.running = True
-            self.reconnect_delay = 1  # Reset delay on successful connection
+            self._attempt = 0  # Reset delay on successful connection
+            self.reconnect_delay = self._backoff[0]
 
             if self.status_callback:
                 self.status_callback("connected")
@@ -78,23 +95,37 @@ class ChatConnection:
 
         if self.connected and self.websocket:
             try:
-                await self.websocket.send(json.dumps(message_data))
+                await self.websocket.send(_dumps(message_data))
             except Exception as e:
                 # Queue message if send fails
-                self.message_queue.append(message_data)
+                kept_all = self._queue_message(message_data)
                 if self.status_callback:
                     self.status_callback(f"send_failed: {e}")
+                    # Reported last so it isn't overwritten in the status bar
+                    if not kept_all:
+                        self.status_callback("offline_queue_full")
         else:
             # Queue message when offline
-            self.message_queue.append(message_data)
+            kept_all = self._queue_message(message_data)
             if self.status_callback:
-                self.status_callback("offline_queued")
+                self.status_callback("offline_queued" if kept_all else "offline_queue_full")
+
+    def _queue_message(self, message_data: dict) -> bool:
+        """
+        Queue a message for sending after reconnection
+
+        Returns False when the queue was full and its oldest message had to
+        be dropped.
+        """
+        full = len(self.message_queue) == self.MAX_QUEUED_MESSAGES
+        self.message_queue.append(message_data)
+        return not full
 
     async def send_pong(self):
         """Respond to server ping with pong"""
         if self.connected and self.websocket:
             try:
-                await self.websocket.send(json.dumps({"type": "pong"}))
+                await self.websocket.send(PONG_FRAME)
             except Exception:
                 pass
 
@@ -102,11 +133,7 @@ class ChatConnection:
         """Send typing indicator to server"""
         if self.connected and self.websocket:
             try:
-                typing_data = {
-                    "type": "typing",
-                    "is_typing": is_typing
-                }
-                await self.websocket.send(json.dumps(typing_data))
+                await self.websocket.send(TYPING_FRAMES[bool(is_typing)])
             except Exception:
                 pass
 
@@ -115,24 +142,29 @@ class ChatConnection:
         if not self.message_queue:
             return
 
-        for message_data in self.message_queue:
+        while self.message_queue and self.websocket:
+            message_data = self.message_queue.popleft()
             try:
-                if self.websocket:
-                    await self.websocket.send(json.dumps(message_data))
+                await self.websocket.send(_dumps(message_data))
             except Exception as e:
+                # Keep the unsent message at the front for the next attempt,
+                # unless the queue refilled meanwhile: appendleft on a full
+                # deque would drop the newest message instead of this oldest one
+                dropped = len(self.message_queue) == self.MAX_QUEUED_MESSAGES
+                if not dropped:
+                    self.message_queue.appendleft(message_data)
                 if self.status_callback:
                     self.status_callback(f"queue_send_failed: {e}")
+                    if dropped:
+                        self.status_callback("offline_queue_full")
                 break
 
-        # Clear successfully sent messages
-        self.message_queue.clear()
-
     async def receive_messages(self):
         """Receive messages from the server"""
         while self.running and self.websocket:
             try:
                 raw_message = await self.websocket.recv()
-                message_data = json.loads(raw_message)
+                message_data = _loads(raw_message)
 
                 # Handle different message types
                 await self.handle_message(message_data)
@@ -146,7 +178,7 @@ class ChatConnection:
                     await self.handle_reconnect()
                 break
 
-            except json.JSONDecodeError as e:
+            except json.JSONDecodeError as e:  # orjson's error subclasses this
                 if self.status_callback:
                     self.status_callback(f"json_error: {e}")
 
@@ -154,8 +186,8 @@ class ChatConnection:
                 if self.status_callback:
                     self.status_callback(f"receive_error: {e}")
 
-    async def handle_message(self, message_data: Dict[str, Any]):
-        """Handle different types of messages from server"""
+    async def handle_message(self, message_data: Mapping[str, Any]):
+        """Handle different types of messages from server (any read-only mapping works)"""
         message_type = message_data.get("type")
 
         if message_type == "ping":
@@ -239,6 +271,31 @@ class ChatConnection:
         """Register a callback for connection status changes"""
         self.status_callback = callback
 
+    @staticmethod
+    def _backoff_schedule(max_delay: int) -> tuple:
+        """Reconnect delays doubling from 1s, capped at max_delay"""
+        delays = [1]
+        while delays[-1] < max_delay:
+            delays.append(min(delays[-1] * 2, max_delay))
+        return tuple(delays)
+
+    @property
+    def max_reconnect_delay(self) -> int:
+        """Longest delay between reconnect attempts"""
+        return self._backoff[-1]
+
+    @max_reconnect_delay.setter
+    def max_reconnect_delay(self, value):
+        """Set the delay cap and rebuild the backoff schedule"""
+        try:
+            # Config values may be hand-edited: accept "30", reject junk
+            max_delay = max(1, int(value))
+        except (TypeError, ValueError, OverflowError):
+            max_delay = 60
+        self._backoff = self._backoff_schedule(max_delay)
+        self._attempt = min(self._attempt, len(self._backoff) - 1)
+
     def increase_reconnect_delay(self):
         """Increase reconnect delay with exponential backoff"""
-        self.reconnect_delay = min(self.reconnect_delay * 2, self.max_reconnect_delay)
+        self._attempt = min(self._attempt + 1, len(self._backoff) - 1)
+        self.reconnect_delay = self._backoff[self._attempt]
@@ -2,35 +2,100 @@
 Encryption utilities for end-to-end encrypted messaging with RSA key exchange
 """
 
-from cryptography.fernet import Fernet
-from cryptography.hazmat.primitives.asymmetric import rsa, padding
-from cryptography.hazmat.primitives import hashes, serialization
-from cryptography.hazmat.backends import default_backend
+from __future__ import annotations
+
+from cryptography.exceptions import InvalidTag
+from cryptography.fernet import Fernet, InvalidToken
 import os
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional, TYPE_CHECKING
 import base64
 
+# RSA, serialization and AEAD modules are only needed at key exchange time
+# (or for AES-GCM sessions), so they are imported where they are used
+if TYPE_CHECKING:
+    from cryptography.hazmat.primitives.asymmetric import rsa
+
+# Message cipher identifiers negotiated during key exchange
+CIPHER_FERNET = "fernet"
+CIPHER_AESGCM = "aes-gcm"
+CIPHER_LABELS = {CIPHER_FERNET: "Fernet", CIPHER_AESGCM: "AES-GCM"}
+# Ciphers this client can use, most preferred first (sent to the server)
+SUPPORTED_CIPHERS = (CIPHER_AESGCM, CIPHER_FERNET)
+
+
+class AESGCMCipher:
+    """
+    AES-256-GCM cipher using the same 32-byte session key as Fernet
+
+    Tokens are url-safe base64 of a 12-byte nonce followed by the
+    ciphertext and GCM tag. This is NOT wire compatible with Fernet.
+    """
+
+    NONCE_SIZE = 12
+
+    def __init__(self, key: bytes):
+        """Validate a session key and build the AEAD context for it"""
+        from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+        raw_key = base64.urlsafe_b64decode(key)
+        if len(raw_key) != 32:
+            raise ValueError("AES-GCM key must be 32 url-safe base64-encoded bytes.")
+
+        self._aead = AESGCM(raw_key)
+
+    def encrypt(self, data: bytes) -> bytes:
+        """Encrypt data into a nonce-prefixed AES-GCM token"""
+        nonce = os.urandom(self.NONCE_SIZE)
+        return base64.urlsafe_b64encode(nonce + self._aead.encrypt(nonce, data, None))
+
+    def decrypt(self, token: bytes) -> bytes:
+        """Verify and decrypt an AES-GCM token"""
+        try:
+            data = base64.urlsafe_b64decode(token)
+            nonce, ciphertext = data[:self.NONCE_SIZE], data[self.NONCE_SIZE:]
+            return self._aead.decrypt(nonce, ciphertext, None)
+        except (ValueError, InvalidTag):
+            raise InvalidToken
+
+
+def make_cipher(key: bytes, algorithm: str = CIPHER_FERNET):
+    """Create the message cipher for a session key"""
+    if algorithm == CIPHER_AESGCM:
+        return AESGCMCipher(key)
+    if algorithm != CIPHER_FERNET:
+        raise ValueError(f"Unsupported message cipher: {algorithm}")
+
+    return Fernet(key)
+
 
 class MessageEncryption:
-    """Handles message encryption and decryption using Fernet symmetric encryption"""
+    """Handles message encryption and decryption with the negotiated cipher (Fernet or AES-GCM)"""
 
-    def __init__(self, key: Optional[bytes] = None):
+    def __init__(self, key: Optional[bytes] = None, algorithm: str = CIPHER_FERNET):
         """
         Initialize encryption with a key.
         If no key is provided, generates a new one.
+
+        The algorithm defaults to Fernet; AES-GCM is only used when both
+        sides have agreed on it during key exchange.
         """
         if key:
             self.key = key
         else:
             self.key = Fernet.generate_key()
-        self.cipher = Fernet(self.key)
+        self.algorithm = algorithm
+        self.cipher = make_cipher(self.key, algorithm)
 
     def encrypt(self, message: str) -> str:
         """Encrypt a message"""
         encrypted = self.cipher.encrypt(message.encode())
         return encrypted.decode()
 
+    def encrypt_many(self, messages: List[str]) -> List[str]:
+        """Encrypt a batch of messages"""
+        return [self.encrypt(message) for message in messages]
+
     def decrypt(self, encrypted_message: str) -> str:
         """Decrypt a message"""
         decrypted = self.cipher.decrypt(encrypted_message.encode())
@@ -42,8 +107,8 @@ class MessageEncryption:
 
     def update_key(self, new_key: bytes):
         """Update the encryption key (for key rotation)"""
+        self.cipher = make_cipher(new_key, self.algorithm)
         self.key = new_key
-        self.cipher = Fernet(new_key)
 
     @staticmethod
     def save_key(key: bytes, filepath: str = None):
@@ -54,8 +119,7 @@ class MessageEncryption:
             config_dir.mkdir(exist_ok=True)
             filepath = config_dir / "encryption.key"
 
-        with open(filepath, "wb") as key_file:
-            key_file.write(key)
+        Path(filepath).write_bytes(key)
 
     @staticmethod
     def load_key(filepath: str = None) -> bytes:
@@ -64,11 +128,10 @@ class MessageEncryption:
             # Default location: ~/.terminal-chat/keys
             filepath = Path.home() / ".terminal-chat" / "encryption.key"
 
-        if not os.path.exists(filepath):
-            raise FileNotFoundError(f"Encryption key not found at {filepath}")
-
-        with open(filepath, "rb") as key_file:
-            return key_file.read()
+        try:
+            return Path(filepath).read_bytes()
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Encryption key not found at {filepath}") from None
 
     @staticmethod
     def generate_and_save_key(filepath: str = None) -> bytes:
@@ -89,12 +152,37 @@ class RSAKeyManager:
         Returns:
             tuple: (private_key_pem, public_key_pem)
         """
-        private_key = rsa.generate_private_key(
+        private_key = RSAKeyManager.generate_private_key()
+        return RSAKeyManager.serialize_key_pair(private_key)
+
+    @staticmethod
+    def generate_private_key() -> rsa.RSAPrivateKey:
+        """
+        Generate an RSA private key object (2048-bit)
+
+        Returns:
+            Loaded RSA private key object
+        """
+        from cryptography.hazmat.primitives.asymmetric import rsa
+
+        return rsa.generate_private_key(
             public_exponent=65537,
-            key_size=2048,
-            backend=default_backend()
+            key_size=2048
         )
 
+    @staticmethod
+    def serialize_key_pair(private_key: rsa.RSAPrivateKey) -> tuple[bytes, bytes]:
+        """
+        Serialize a loaded RSA private key and its public key to PEM
+
+        Args:
+            private_key: Loaded RSA private key object
+
+        Returns:
+            tuple: (private_key_pem, public_key_pem)
+        """
+        from cryptography.hazmat.primitives import serialization
+
         # Serialize private key
         private_pem = private_key.private_bytes(
             encoding=serialization.Encoding.PEM,
@@ -123,12 +211,42 @@ class RSAKeyManager:
         Returns:
             Decrypted data
         """
-        private_key = serialization.load_pem_private_key(
+        private_key = RSAKeyManager.load_private_key_object(private_key_pem)
+        return RSAKeyManager.decrypt_with_loaded_key(private_key, encrypted_data)
+
+    @staticmethod
+    def load_private_key_object(private_key_pem: bytes) -> rsa.RSAPrivateKey:
+        """
+        Parse a PEM encoded RSA private key
+
+        Args:
+            private_key_pem: Private key in PEM format
+
+        Returns:
+            Loaded RSA private key object
+        """
+        from cryptography.hazmat.primitives import serialization
+
+        return serialization.load_pem_private_key(
             private_key_pem,
-            password=None,
-            backend=default_backend()
+            password=None
         )
 
+    @staticmethod
+    def decrypt_with_loaded_key(private_key: rsa.RSAPrivateKey, encrypted_data: bytes) -> bytes:
+        """
+        Decrypt data with an already loaded RSA private key
+
+        Args:
+            private_key: Loaded RSA private key object
+            encrypted_data: Encrypted data
+
+        Returns:
+            Decrypted data
+        """
+        from cryptography.hazmat.primitives import hashes
+        from cryptography.hazmat.primitives.asymmetric import padding
+
         decrypted = private_key.decrypt(
             encrypted_data,
             padding.OAEP(
@@ -141,13 +259,14 @@ class RSAKeyManager:
         return decrypted
 
     @staticmethod
-    def save_private_key(private_key_pem: bytes, filepath: str = None):
+    def save_private_key(private_key_pem: bytes, filepath: str = None, public_key_pem: bytes = None):
         """
         Save RSA private key to a file
 
         Args:
             private_key_pem: Private key in PEM format
             filepath: Optional custom filepath
+            public_key_pem: Optional public key, saved as public.key alongside
         """
         if filepath is None:
             config_dir = Path.home() / ".terminal-chat"
@@ -155,12 +274,14 @@ class RSAKeyManager:
             filepath = config_dir / "private.key"
 
         # Write with restrictive permissions
-        with open(filepath, "wb") as key_file:
-            key_file.write(private_key_pem)
+        Path(filepath).write_bytes(private_key_pem)
 
         # Set file permissions to 600 (read/write for owner only)
         os.chmod(filepath, 0o600)
 
+        if public_key_pem is not None:
+            RSAKeyManager.save_public_key(public_key_pem, Path(filepath).with_name("public.key"))
+
     @staticmethod
     def load_private_key(filepath: str = None) -> bytes:
         """
@@ -175,11 +296,45 @@ class RSAKeyManager:
         if filepath is None:
             filepath = Path.home() / ".terminal-chat" / "private.key"
 
-        if not os.path.exists(filepath):
-            raise FileNotFoundError(f"Private key not found at {filepath}")
+        try:
+            return Path(filepath).read_bytes()
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Private key not found at {filepath}") from None
 
-        with open(filepath, "rb") as key_file:
-            return key_file.read()
+    @staticmethod
+    def save_public_key(public_key_pem: bytes, filepath: str = None):
+        """
+        Save RSA public key to a file
+
+        Args:
+            public_key_pem: Public key in PEM format
+            filepath: Optional custom filepath
+        """
+        if filepath is None:
+            config_dir = Path.home() / ".terminal-chat"
+            config_dir.mkdir(exist_ok=True, mode=0o700)
+            filepath = config_dir / "public.key"
+
+        Path(filepath).write_bytes(public_key_pem)
+
+    @staticmethod
+    def load_public_key(filepath: str = None) -> bytes:
+        """
+        Load RSA public key from a file
+
+        Args:
+            filepath: Optional custom filepath
+
+        Returns:
+            Public key in PEM format
+        """
+        if filepath is None:
+            filepath = Path.home() / ".terminal-chat" / "public.key"
+
+        try:
+            return Path(filepath).read_bytes()
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Public key not found at {filepath}") from None
 
     @staticmethod
     def get_or_create_key_pair() -> tuple[bytes, bytes]:
@@ -189,29 +344,50 @@ class RSAKeyManager:
         Returns:
             tuple: (private_key_pem, public_key_pem)
         """
+        private_key_pem, public_key_pem, _ = RSAKeyManager.get_or_create_loaded_key_pair()
+        return private_key_pem, public_key_pem
+
+    @staticmethod
+    def get_or_create_loaded_key_pair() -> tuple[bytes, bytes, Optional[rsa.RSAPrivateKey]]:
+        """
+        Get existing key pair or generate new one
+
+        The private key is only parsed when it has to be (new key pair, or
+        no cached public key on disk). Otherwise the third item is None.
+
+        Returns:
+            tuple: (private_key_pem, public_key_pem, private_key or None)
+        """
         try:
             private_key_pem = RSAKeyManager.load_private_key()
+        except FileNotFoundError:
+            # Generate new key pair
+            private_key = RSAKeyManager.generate_private_key()
+            private_key_pem, public_key_pem = RSAKeyManager.serialize_key_pair(private_key)
+            RSAKeyManager.save_private_key(private_key_pem, public_key_pem=public_key_pem)
+            return private_key_pem, public_key_pem, private_key
 
-            # Load private key and extract public key
-            private_key = serialization.load_pem_private_key(
-                private_key_pem,
-                password=None,
-                backend=default_backend()
-            )
+        key_dir = Path.home() / ".terminal-chat"
+        try:
+            # Both keys cached on disk, no parsing needed. A public.key older
+            # than private.key was left behind by a replaced private key.
+            if os.stat(key_dir / "public.key").st_mtime_ns >= os.stat(key_dir / "private.key").st_mtime_ns:
+                return private_key_pem, RSAKeyManager.load_public_key(), None
+        except FileNotFoundError:
+            pass
 
-            public_key = private_key.public_key()
-            public_key_pem = public_key.public_bytes(
-                encoding=serialization.Encoding.PEM,
-                format=serialization.PublicFormat.SubjectPublicKeyInfo
-            )
+        # Older installs only stored the private key, or the cached public key
+        # is stale: derive and cache the public key
+        from cryptography.hazmat.primitives import serialization
 
-            return private_key_pem, public_key_pem
+        private_key = RSAKeyManager.load_private_key_object(private_key_pem)
+        public_key_pem = private_key.public_key().public_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PublicFormat.SubjectPublicKeyInfo
+        )
+        RSAKeyManager.save_public_key(public_key_pem)
 
-        except FileNotFoundError:
-            # Generate new key pair
-            private_key_pem, public_key_pem = RSAKeyManager.generate_key_pair()
-            RSAKeyManager.save_private_key(private_key_pem)
-            return private_key_pem, public_key_pem
+        return private_key_pem, public_key_pem, private_key
 
 
 class ClientEncryption:
@@ -225,8 +401,14 @@ class ClientEncryption:
 
     def __init__(self):
         """Initialize client encryption"""
-        # Get or create RSA key pair
-        self.private_key, self.public_key = RSAKeyManager.get_or_create_key_pair()
+        # Get or create RSA key pair (parsed private key may be None until first use)
+        (
+            self.private_key,
+            self.public_key,
+            self._private_key_obj,
+        ) = RSAKeyManager.get_or_create_loaded_key_pair()
+        # Public key never changes, so encode it for transmission once
+        self._public_key_b64 = base64.b64encode(self.public_key).decode('ascii')
 
         # Session key will be set after key exchange
         self.session_key: Optional[bytes] = None
@@ -238,23 +420,50 @@ class ClientEncryption:
 
     def get_public_key_b64(self) -> str:
         """Get client's RSA public key as base64 string for transmission"""
-        return base64.b64encode(self.public_key).decode('utf-8')
+        return self._public_key_b64
 
-    def set_session_key_encrypted(self, encrypted_session_key: bytes):
+    def set_session_key_encrypted(self, encrypted_session_key: bytes, algorithm: str = CIPHER_FERNET):
         """
         Decrypt and set session key from server
 
         Args:
             encrypted_session_key: Session key encrypted with client's public key
+            algorithm: Message cipher negotiated with the server
         """
+        # Private key is parsed on first use and reused afterwards
+        if self._private_key_obj is None:
+            self._private_key_obj = RSAKeyManager.load_private_key_object(self.private_key)
+            self._check_cached_public_key()
+
         # Decrypt session key with private key
-        self.session_key = RSAKeyManager.decrypt_with_private_key(
-            self.private_key,
+        session_key = RSAKeyManager.decrypt_with_loaded_key(
+            self._private_key_obj,
             encrypted_session_key
         )
 
-        # Initialize message encryption with session key
-        self.encryption = MessageEncryption(self.session_key)
+        # Build the cipher before touching state, so an unknown algorithm
+        # leaves the previous session key and cipher in place
+        encryption = MessageEncryption(session_key, algorithm)
+        self.session_key = session_key
+        self.encryption = encryption
+
+    def _check_cached_public_key(self):
+        """
+        Rewrite public.key if it doesn't belong to the parsed private key
+
+        A private.key restored with its old mtime (cp -p, tar, rsync -a) can
+        leave a newer, mismatched public.key that the mtime check trusts.
+        """
+        from cryptography.hazmat.primitives import serialization
+
+        public_key_pem = self._private_key_obj.public_key().public_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PublicFormat.SubjectPublicKeyInfo
+        )
+        if public_key_pem != self.public_key:
+            RSAKeyManager.save_public_key(public_key_pem)
+            self.public_key = public_key_pem
+            self._public_key_b64 = base64.b64encode(public_key_pem).decode('ascii')
 
     def encrypt_message(self, message: str) -> str:
         """
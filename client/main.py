@@ -3,19 +3,23 @@ Terminal Chat Client - Entry point
 """
 
 import asyncio
-import aiohttp
 import os
-from typing import Dict, Any
-from .ui import ChatApp, ChatScreen
-from .connection import ChatConnection
+from typing import Dict, Any, TYPE_CHECKING
 from .config import get_config
-from .crypto import ClientEncryption
+
+# Textual, aiohttp and cryptography are imported where first used so that
+# --help, --version and --config start quickly
+if TYPE_CHECKING:
+    from .connection import ChatConnection
 
 
 class ChatClient:
     """Main chat client controller integrated with Textual"""
 
     def __init__(self, server_url: str = None):
+        from .ui import ChatApp
+        from .crypto import ClientEncryption
+
         # Load configuration
         self.config = get_config()
 
@@ -24,7 +28,7 @@ class ChatClient:
         self.ws_url = self.server_url.replace('http://', 'ws://').replace('https://', 'wss://')
 
         self.app = ChatApp()
-        self.connection: ChatConnection = None
+        self.connection: "ChatConnection" = None
         self.user_id: int = None
         self.username: str = None
         self.token: str = None
@@ -50,11 +54,17 @@ class ChatClient:
 
     async def handle_login(self, username: str, password: str, action: str):
         """Handle login or registration"""
+        import aiohttp
+        from .crypto import SUPPORTED_CIPHERS
         try:
             async with aiohttp.ClientSession() as session:
                 endpoint = f"{self.server_url}/api/{action}"
                 data = {"username": username, "password": password}
 
+                # Let the server pick a message cipher this client supports;
+                # servers that ignore this keep sending Fernet session keys
+                data["ciphers"] = list(SUPPORTED_CIPHERS)
+
                 # Include public key for registration
                 if action == "register":
                     data["public_key"] = self.encryption.get_public_key_b64()
@@ -98,8 +108,12 @@ class ChatClient:
 
     async def connect_websocket(self):
         """Connect to WebSocket server"""
+        from .connection import ChatConnection
         try:
-            self.connection = ChatConnection(self.ws_url, self.user_id, self.token)
+            self.connection = ChatConnection(
+                self.ws_url, self.user_id, self.token,
+                max_reconnect_delay=self.config.get('max_reconnect_delay', 60),
+            )
 
             # Set up message and status callbacks
             self.connection.on_message(self.handle_incoming_message)
@@ -111,7 +125,7 @@ class ChatClient:
             # Set up typing indicator callback
             chat_screen = self.app.get_chat_screen()
             if chat_screen:
-                chat_screen.add_system_message("End-to-end encryption enabled (RSA + Fernet)")
+                chat_screen.add_system_message("End-to-end encryption enabled (RSA key exchange)")
                 # Set up typing indicator callback
                 chat_screen.set_typing_indicator_callback(self.handle_typing_indicator_sync)
 
@@ -133,6 +147,7 @@ class ChatClient:
 
     async def load_history(self):
         """Load message history from server"""
+        import aiohttp
         chat_screen = self.app.get_chat_screen()
 
         try:
@@ -208,14 +223,18 @@ class ChatClient:
         elif message_type == "key_exchange":
             # Key exchange message - decrypt and set session key
             import base64
+            from .crypto import CIPHER_FERNET, CIPHER_LABELS
             try:
                 encrypted_session_key_b64 = message_data.get("encrypted_session_key", "")
                 encrypted_session_key = base64.b64decode(encrypted_session_key_b64)
 
                 # Decrypt and set session key
-                self.encryption.set_session_key_encrypted(encrypted_session_key)
+                cipher = message_data.get("cipher", CIPHER_FERNET)
+                self.encryption.set_session_key_encrypted(encrypted_session_key, cipher)
 
-                chat_screen.add_system_message("Secure session key received and decrypted")
+                chat_screen.add_system_message(
+                    f"Secure session key received and decrypted (RSA + {CIPHER_LABELS[cipher]})"
+                )
 
             except Exception as e:
                 chat_screen.add_system_message(f"Key exchange failed: {str(e)}")
@@ -223,14 +242,16 @@ class ChatClient:
         elif message_type == "key_rotation":
             # Key rotation message - decrypt and update session key
             import base64
+            from .crypto import CIPHER_FERNET, CIPHER_LABELS
             try:
                 encrypted_session_key_b64 = message_data.get("encrypted_session_key", "")
                 encrypted_session_key = base64.b64decode(encrypted_session_key_b64)
 
                 # Decrypt and set new session key
-                self.encryption.set_session_key_encrypted(encrypted_session_key)
+                cipher = message_data.get("cipher", CIPHER_FERNET)
+                self.encryption.set_session_key_encrypted(encrypted_session_key, cipher)
 
-                chat_screen.add_system_message("Session key rotated successfully")
+                chat_screen.add_system_message(f"Session key rotated successfully ({CIPHER_LABELS[cipher]})")
 
             except Exception as e:
                 chat_screen.add_system_message(f"Key rotation failed: {str(e)}")
@@ -290,6 +311,8 @@ class ChatClient:
             status_message = "Reconnected!"
         elif status == "offline_queued":
             status_message = "Offline - message queued"
+        elif status == "offline_queue_full":
+            status_message = "Offline queue full - oldest message dropped"
 
         chat_screen.update_status(status_message)
 
@@ -8,9 +8,21 @@ from textual.widgets import Header, Footer, Input, Static, Button, Label, RichLo
 from textual.binding import Binding
 from textual.screen import Screen
 from datetime import datetime
-from typing import Optional, Callable
+from typing import Optional, Callable, Dict, List, Union
 from rich.text import Text
-import hashlib
+import functools
+import re
+import time
+import zlib
+
+
+# Usernames: 3-30 chars of letters, numbers, underscores and hyphens
+# (\w follows str.isalnum(), so non-ASCII letters are allowed)
+_USERNAME_RE = re.compile(r'\A[\w-]{3,30}\Z')
+
+# Constant chat header labels
+_E2EE_LABEL = "🔒 E2EE"
+_ONLINE_INITIAL = "Online: 0"
 
 
 class LoginScreen(Screen):
@@ -72,6 +84,10 @@ class LoginScreen(Screen):
     def __init__(self, on_login: Callable):
         super().__init__()
         self.on_login = on_login
+        # Widgets resolved once in on_mount
+        self._username_input: Optional[Input] = None
+        self._password_input: Optional[Input] = None
+        self._status_label: Optional[Label] = None
 
     def compose(self) -> ComposeResult:
         """Compose the login screen"""
@@ -95,27 +111,22 @@ class LoginScreen(Screen):
                 yield Button("Register", variant="success", id="register-btn")
             yield Label("", id="status-label")
 
+    def on_mount(self) -> None:
+        """Cache widget lookups once the screen is composed"""
+        self._username_input = self.query_one("#username-input", Input)
+        self._password_input = self.query_one("#password-input", Input)
+        self._status_label = self.query_one("#status-label", Label)
+
     def on_button_pressed(self, event: Button.Pressed) -> None:
         """Handle button presses"""
-        username_input = self.query_one("#username-input", Input)
-        password_input = self.query_one("#password-input", Input)
-        status_label = self.query_one("#status-label", Label)
+        status_label = self._status_label
 
-        username = username_input.value.strip()
-        password = password_input.value.strip()
+        username = self._username_input.value.strip()
+        password = self._password_input.value.strip()
 
         # Validation
-        if len(username) < 3:
-            status_label.update("Username must be at least 3 characters")
-            return
-
-        if len(username) > 30:
-            status_label.update("Username must be less than 30 characters")
-            return
-
-        # Check for valid characters
-        if not username.replace('_', '').replace('-', '').isalnum():
-            status_label.update("Username: letters, numbers, _, - only")
+        if not _USERNAME_RE.match(username):
+            status_label.update("Username: 3-30 chars, letters/numbers/_/-")
             return
 
         if len(password) < 6:
@@ -137,8 +148,7 @@ class LoginScreen(Screen):
 
     def show_error(self, message: str):
         """Show error message"""
-        status_label = self.query_one("#status-label", Label)
-        status_label.update(f"Error: {message}")
+        self._status_label.update(f"Error: {message}")
 
 
 class ChatScreen(Screen):
@@ -253,41 +263,68 @@ class ChatScreen(Screen):
         Binding("ctrl+q", "quit", "Quit"),
     ]
 
+    # Seconds of input inactivity before the typing indicator is cleared
+    TYPING_TIMEOUT = 3.0
+
     def __init__(self, username: str, on_send_message: Callable):
         super().__init__()
         self.username = username
+        self._title = f"Terminal Chat - {username}"
         self.on_send_message = on_send_message
         self.online_users_count = 0
         self.online_usernames = []
-        # User colors for consistent color assignment
-        self.user_colors = {}
         self.available_colors = [
             "cyan", "magenta", "yellow", "blue",
             "green", "bright_cyan", "bright_magenta", "bright_yellow"
         ]
+        # Memoized color lookup for consistent color assignment
+        self._color_for_user = functools.lru_cache(maxsize=512)(self._compute_color)
+        # Per-user styled "username:" prefixes, keyed by username
+        self._msg_prefix: Dict[str, Text] = {}
         # Typing indicator tracking
-        self.typing_users = set()  # Set of usernames currently typing
+        self._typer_count = 0  # Number of other users currently typing
+        self._single_typer: Optional[str] = None  # The typer when exactly one is typing
+        self.typing_users = set()  # Usernames currently typing, only used for 2+ typers
         self.typing_indicator_callback = None  # Callback to send typing events
-        self.typing_timer = None  # Timer to debounce typing indicator
+        self.typing_timer = None  # Single interval timer that checks for typing inactivity
+        self._last_typed_at = 0.0  # time.monotonic() of the last keystroke
         self.is_currently_typing = False  # Track if user is currently indicated as typing
+        # Widgets resolved once in on_mount
+        self._message_display: Optional[RichLog] = None
+        self._status_bar: Optional[Label] = None
+        self._online_label: Optional[Label] = None
+        self._typing_label: Optional[Label] = None
+        self._online_label_text = _ONLINE_INITIAL
+        self._last_typing_text = ""
 
     def get_user_color(self, username: str) -> str:
         """Get a consistent color for a username"""
-        if username not in self.user_colors:
-            # Use hash to get consistent color for username
-            hash_value = int(hashlib.md5(username.encode()).hexdigest(), 16)
-            color_index = hash_value % len(self.available_colors)
-            self.user_colors[username] = self.available_colors[color_index]
-        return self.user_colors[username]
+        return self._color_for_user(username)
+
+    def _compute_color(self, username: str) -> str:
+        """Pick a color for a username (stable across sessions)"""
+        # crc32 is deterministic, unlike hash() which is salted per process
+        color_index = zlib.crc32(username.encode()) % len(self.available_colors)
+        return self.available_colors[color_index]
+
+    def _prefix_for(self, username: str) -> Text:
+        """Get the cached styled username prefix for a message"""
+        prefix = self._msg_prefix.get(username)
+        if prefix is None:
+            # Use different color for own messages
+            color = "white" if username == self.username else self.get_user_color(username)
+            prefix = Text(f"{username}:", style=f"bold {color}")
+            self._msg_prefix[username] = prefix
+        return prefix
 
     def compose(self) -> ComposeResult:
         """Compose the chat screen"""
         # Header
         with Container(id="chat-header"):
             with Horizontal(id="header-content"):
-                yield Label(f"Terminal Chat - {self.username}", id="app-title")
-                yield Label("🔒 E2EE", id="encryption-indicator")
-                yield Label("Online: 0", id="online-users")
+                yield Label(self._title, id="app-title")
+                yield Label(_E2EE_LABEL, id="encryption-indicator")
+                yield Label(_ONLINE_INITIAL, id="online-users")
 
         # Status bar
         yield Label("Connecting...", id="status-bar")
@@ -296,12 +333,22 @@ class ChatScreen(Screen):
         yield Label("", id="typing-indicator")
 
         # Message display area
-        yield RichLog(id="message-display", highlight=True, markup=True, wrap=True)
+        yield RichLog(id="message-display", highlight=True, markup=False, wrap=True)
 
         # Input area
         with Container(id="input-container"):
             yield Input(placeholder="Type a message and press Enter...", id="message-input")
 
+    def on_mount(self) -> None:
+        """Cache widget lookups once the screen is composed"""
+        self._message_display = self.query_one("#message-display", RichLog)
+        self._status_bar = self.query_one("#status-bar", Label)
+        self._online_label = self.query_one("#online-users", Label)
+        self._typing_label = self.query_one("#typing-indicator", Label)
+
+        # Paused until the user starts typing; never re-created per keystroke
+        self.typing_timer = self.set_interval(1.0, self._check_typing_timeout, pause=True)
+
     def on_input_submitted(self, event: Input.Submitted) -> None:
         """Handle message submission"""
         message = event.value.strip()
@@ -321,26 +368,29 @@ class ChatScreen(Screen):
 
     def add_message(self, username: str, content: str, timestamp: str = None, play_sound: bool = True):
         """Add a chat message to the display"""
-        message_display = self.query_one("#message-display", RichLog)
+        message_display = self._message_display
 
         # Format timestamp
         if timestamp:
             try:
-                dt = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
-                time_str = dt.strftime("%H:%M:%S")
+                try:
+                    dt = datetime.fromisoformat(timestamp)
+                except ValueError:
+                    # Python < 3.11 doesn't accept a trailing 'Z'
+                    dt = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+                time_str = f"{dt.hour:02d}:{dt.minute:02d}:{dt.second:02d}"
             except Exception:
                 time_str = timestamp[:8] if len(timestamp) >= 8 else ""
         else:
-            time_str = datetime.now().strftime("%H:%M:%S")
-
-        # Get user color
-        user_color = self.get_user_color(username)
+            dt = datetime.now()
+            time_str = f"{dt.hour:02d}:{dt.minute:02d}:{dt.second:02d}"
 
-        # Use different color for own messages
-        if username == self.username:
-            new_message = f"[dim]{time_str}[/dim] [bold white]{username}:[/bold white] {content}"
-        else:
-            new_message = f"[dim]{time_str}[/dim] [bold {user_color}]{username}:[/bold {user_color}] {content}"
+        # Styled Text is written as-is, so RichLog won't highlight it; the
+        # content is run through the log's highlighter (URLs, numbers) here
+        new_message = Text.assemble(
+            (time_str, "dim"), " ", self._prefix_for(username), " ",
+            message_display.highlighter(Text(content)),
+        )
 
         # Write the message to RichLog
         message_display.write(new_message)
@@ -349,40 +399,53 @@ class ChatScreen(Screen):
         if play_sound and username != self.username:
             self.app.bell()
 
-    def add_system_message(self, message: str):
-        """Add a system message (user joined, left, etc.)"""
-        message_display = self.query_one("#message-display", RichLog)
+    def add_system_message(self, message: Union[str, List[str]]):
+        """
+        Add a system message (user joined, left, etc.)
+
+        A list of lines is written with a single log write; each line gets
+        the same timestamp prefix.
+        """
+        lines = [message] if isinstance(message, str) else message
 
         time_str = datetime.now().strftime("%H:%M:%S")
-        # Use Rich markup for system messages
-        new_message = f"[dim]{time_str}[/dim] [italic yellow]* {message}[/italic yellow]"
+        highlighter = self._message_display.highlighter
+        new_message = Text("\n").join(
+            Text.assemble((time_str, "dim"), " ", highlighter(Text(f"* {line}", "italic yellow")))
+            for line in lines
+        )
 
         # Write the system message to RichLog
-        message_display.write(new_message)
+        self._message_display.write(new_message)
 
     def update_status(self, status: str):
         """Update the status bar"""
-        status_bar = self.query_one("#status-bar", Label)
-        status_bar.update(status)
+        self._status_bar.update(status)
 
     def update_online_users(self, count: int, usernames: list = None):
         """Update online users count and list"""
         self.online_users_count = count
-        self.online_usernames = usernames or []
-        online_label = self.query_one("#online-users", Label)
+        # Sort once here so /who can display the list as-is
+        self.online_usernames = sorted(usernames) if usernames else []
+        usernames = self.online_usernames
 
         # Display count and usernames if available
         if usernames:
             # Limit the display to show just a few names, then "..."
             if len(usernames) <= 3:
                 names_str = ", ".join(usernames)
-                online_label.update(f"Online ({count}): {names_str}")
+                label_text = f"Online ({count}): {names_str}"
             else:
                 # Show first 3 names and indicate there are more
                 names_str = ", ".join(usernames[:3])
-                online_label.update(f"Online ({count}): {names_str}...")
+                label_text = f"Online ({count}): {names_str}..."
         else:
-            online_label.update(f"Online: {count}")
+            label_text = f"Online: {count}"
+
+        # Skip the widget update when presence didn't visibly change
+        if label_text != self._online_label_text:
+            self._online_label_text = label_text
+            self._online_label.update(label_text)
 
     def handle_command(self, command: str):
         """Handle slash commands"""
@@ -412,24 +475,25 @@ class ChatScreen(Screen):
             "Keyboard Shortcuts:",
             "  Ctrl+C/Q    - Quit application"
         ]
-        for line in help_text:
-            self.add_system_message(line)
+        self.add_system_message(help_text)
 
     def show_online_users(self):
         """Show the list of all online users"""
         if not self.online_usernames:
             self.add_system_message(f"Online users ({self.online_users_count}): No user list available")
         else:
-            self.add_system_message(f"Online users ({self.online_users_count}):")
-            for username in sorted(self.online_usernames):
+            lines = [f"Online users ({self.online_users_count}):"]
+            for username in self.online_usernames:
                 marker = " (you)" if username == self.username else ""
-                self.add_system_message(f"  • {username}{marker}")
+                lines.append(f"  • {username}{marker}")
+            self.add_system_message(lines)
 
     def clear_messages(self):
         """Clear the message display"""
-        message_display = self.query_one("#message-display", RichLog)
-        message_display.clear()
-        self.add_system_message("Message history cleared")
+        # Clear and confirm in one repaint rather than two
+        with self.app.batch_update():
+            self._message_display.clear()
+            self.add_system_message("Message history cleared")
 
     def action_quit(self) -> None:
         """Quit the application"""
@@ -437,29 +501,59 @@ class ChatScreen(Screen):
 
     def update_typing_indicator(self, username: str, is_typing: bool):
         """Update typing indicator when users start/stop typing"""
-        if is_typing:
-            self.typing_users.add(username)
+        count = self._typer_count
+        if count == 1:
+            already_typing = username == self._single_typer
         else:
-            self.typing_users.discard(username)
+            already_typing = username in self.typing_users
 
-        # Update the typing indicator label
-        typing_label = self.query_one("#typing-indicator", Label)
+        # Repeated "still typing" pings don't change anything
+        if already_typing == is_typing:
+            return
 
-        if not self.typing_users:
-            # Hide the typing indicator when no one is typing
-            typing_label.update("")
-            typing_label.remove_class("visible")
-        elif len(self.typing_users) == 1:
-            username = list(self.typing_users)[0]
-            typing_label.update(f"{username} is typing...")
-            typing_label.add_class("visible")
-        elif len(self.typing_users) == 2:
+        # 0 or 1 typers are tracked without the set; it's only used for 2+
+        if is_typing:
+            if count == 0:
+                self._single_typer = username
+            elif count == 1:
+                self.typing_users = {self._single_typer, username}
+                self._single_typer = None
+            else:
+                self.typing_users.add(username)
+            count += 1
+        else:
+            if count == 1:
+                self._single_typer = None
+            else:
+                self.typing_users.discard(username)
+                if count == 2:
+                    self._single_typer = self.typing_users.pop()
+            count -= 1
+        self._typer_count = count
+
+        # Build the typing indicator text
+        if count == 0:
+            text = ""
+        elif count == 1:
+            text = f"{self._single_typer} is typing..."
+        elif count == 2:
             users = sorted(self.typing_users)
-            typing_label.update(f"{users[0]} and {users[1]} are typing...")
-            typing_label.add_class("visible")
+            text = f"{users[0]} and {users[1]} are typing..."
         else:
-            typing_label.update(f"{len(self.typing_users)} people are typing...")
+            text = f"{count} people are typing..."
+
+        if text == self._last_typing_text:
+            return
+        self._last_typing_text = text
+
+        # Update the typing indicator label
+        typing_label = self._typing_label
+        typing_label.update(text)
+        if text:
             typing_label.add_class("visible")
+        else:
+            # Hide the typing indicator when no one is typing
+            typing_label.remove_class("visible")
 
     def set_typing_indicator_callback(self, callback: Callable):
         """Set callback for sending typing indicator events"""
@@ -470,32 +564,30 @@ class ChatScreen(Screen):
         if event.input.id != "message-input":
             return
 
-        # Remove existing timer
-        if self.typing_timer:
-            try:
-                self.remove_timer(self.typing_timer)
-            except:
-                pass  # Timer may have already expired
-
         if event.value:
+            self._last_typed_at = time.monotonic()
+
             # Send typing indicator when user starts typing (if not already sent)
             if not self.is_currently_typing and self.typing_indicator_callback:
                 self.typing_indicator_callback(True)
                 self.is_currently_typing = True
-
-            # Set timer to stop typing indicator after 3 seconds of inactivity
-            self.typing_timer = self.set_timer(3.0, self.stop_typing_indicator)
+                self.typing_timer.resume()
         else:
             # Send stop typing when input is cleared
-            if self.is_currently_typing and self.typing_indicator_callback:
-                self.typing_indicator_callback(False)
-                self.is_currently_typing = False
+            self.stop_typing_indicator()
+
+    def _check_typing_timeout(self) -> None:
+        """Stop typing indicator after TYPING_TIMEOUT seconds of inactivity"""
+        if time.monotonic() - self._last_typed_at > self.TYPING_TIMEOUT:
+            self.stop_typing_indicator()
 
     def stop_typing_indicator(self) -> None:
         """Stop typing indicator after timeout"""
         if self.is_currently_typing and self.typing_indicator_callback:
             self.typing_indicator_callback(False)
             self.is_currently_typing = False
+        if self.typing_timer:
+            self.typing_timer.pause()
 
 
 class ChatApp(App):
@@ -508,10 +600,14 @@ class ChatApp(App):
         self.token: Optional[str] = None
         self.send_message_callback: Optional[Callable] = None
         self.login_callback: Optional[Callable] = None
+        # Active screens, tracked directly instead of scanning screen_stack
+        self._login_screen: Optional[LoginScreen] = None
+        self._chat_screen: Optional[ChatScreen] = None
 
     def on_mount(self) -> None:
         """Show login screen on startup"""
-        self.push_screen(LoginScreen(self.handle_login))
+        self._login_screen = LoginScreen(self.handle_login)
+        self.push_screen(self._login_screen)
 
     def handle_login(self, username: str, password: str, action: str):
         """Handle login/register action"""
@@ -526,7 +622,9 @@ class ChatApp(App):
 
         # Remove login screen and show chat
         self.pop_screen()
-        self.push_screen(ChatScreen(username, self.handle_send_message))
+        self._login_screen = None
+        self._chat_screen = ChatScreen(username, self.handle_send_message)
+        self.push_screen(self._chat_screen)
 
     def handle_send_message(self, message: str):
         """Handle message sending"""
@@ -543,14 +641,9 @@ class ChatApp(App):
 
     def get_chat_screen(self) -> Optional[ChatScreen]:
         """Get the chat screen if it exists"""
-        for screen in self.screen_stack:
-            if isinstance(screen, ChatScreen):
-                return screen
-        return None
+        return self._chat_screen
 
     def show_login_error(self, message: str):
         """Show error on login screen"""
-        for screen in self.screen_stack:
-            if isinstance(screen, LoginScreen):
-                screen.show_error(message)
-                break
+        if self._login_screen:
+            self._login_screen.show_error(message)
@@ -2,31 +2,92 @@
 Pytest configuration and fixtures for terminal-chat-client tests
 """
 
+import asyncio
 import pytest
-import os
-import tempfile
 import json
+import websockets
+from dataclasses import dataclass, field
+from types import MappingProxyType
 from unittest.mock import Mock, AsyncMock, patch
 
 from client.crypto import MessageEncryption
 from client.config import ClientConfig
 
 
-@pytest.fixture
-def temp_config_dir():
-    """Create a temporary directory for config files"""
-    temp_dir = tempfile.mkdtemp()
-    yield temp_dir
-    # Cleanup
-    import shutil
-    if os.path.exists(temp_dir):
-        shutil.rmtree(temp_dir)
+# Sample payloads are shared between tests, so they are built once and
+# wrapped in read-only mappings; copy them with dict() before mutating.
+_SAMPLE_USER_DATA = MappingProxyType({
+    "username": "testuser",
+    "password": "testpass123"
+})
+
+_SAMPLE_TOKEN_RESPONSE = MappingProxyType({
+    "access_token": "eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9.test.token",
+    "token_type": "bearer",
+    "user_id": 1,
+    "username": "testuser"
+})
+
+_SAMPLE_MESSAGE = MappingProxyType({
+    "type": "message",
+    "content": "Hello, this is a test message!",
+    "username": "testuser",
+    "user_id": 1,
+    "timestamp": "2024-01-01T12:00:00Z"
+})
+
+_SAMPLE_HISTORY = tuple(MappingProxyType(message) for message in [
+    {
+        "id": 1,
+        "user_id": 1,
+        "username": "user1",
+        "content": "Message 1",
+        "timestamp": "2024-01-01T12:00:00Z",
+        "room_id": "general"
+    },
+    {
+        "id": 2,
+        "user_id": 2,
+        "username": "user2",
+        "content": "Message 2",
+        "timestamp": "2024-01-01T12:01:00Z",
+        "room_id": "general"
+    },
+    {
+        "id": 3,
+        "user_id": 1,
+        "username": "user1",
+        "content": "Message 3",
+        "timestamp": "2024-01-01T12:02:00Z",
+        "room_id": "general"
+    }
+])
+
+
+@pytest.fixture(scope="session")
+def event_loop():
+    """Share one event loop across the async tests (uvloop when available)"""
+    try:
+        import uvloop
+        loop = uvloop.new_event_loop()
+    except ImportError:
+        loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture(scope="session")
+def session_encryption_key(tmp_path_factory):
+    """Shared encryption key for tests that don't mutate it"""
+    key_path = str(tmp_path_factory.mktemp("enc") / "session_encryption.key")
+    key = MessageEncryption.generate_and_save_key(key_path)
+    return MessageEncryption(key=key)
 
 
 @pytest.fixture
-def encryption_key(temp_config_dir):
-    """Create a temporary encryption key for testing"""
-    key_path = os.path.join(temp_config_dir, "test_encryption.key")
+def encryption_key(tmp_path):
+    """Create a temporary encryption key for testing (isolated per test)"""
+    key_path = str(tmp_path / "test_encryption.key")
     # Generate and save a key, then create MessageEncryption with it
     key = MessageEncryption.generate_and_save_key(key_path)
     encryption = MessageEncryption(key=key)
@@ -34,22 +95,46 @@ def encryption_key(temp_config_dir):
 
 
 @pytest.fixture
-def test_config(temp_config_dir):
+def test_config(tmp_path):
     """Create a test client configuration"""
-    config_path = os.path.join(temp_config_dir, "config.json")
+    config_path = str(tmp_path / "config.json")
     config = ClientConfig(config_path=config_path)
     return config
 
 
+class FakeWebSocket:
+    """
+    Lightweight stand-in for a websockets client connection
+
+    Records sent frames in `sent`, serves `incoming` frames from recv()
+    and raises `send_error` from send() once `fail_after` frames were sent.
+    """
+
+    def __init__(self):
+        self.sent = []
+        self.incoming = []
+        self.closed = False
+        self.send_error = None
+        self.fail_after = 0
+
+    async def send(self, data):
+        if self.send_error is not None and len(self.sent) >= self.fail_after:
+            raise self.send_error
+        self.sent.append(data)
+
+    async def recv(self):
+        if not self.incoming:
+            raise websockets.exceptions.ConnectionClosed(None, None)
+        return self.incoming.pop(0)
+
+    async def close(self):
+        self.closed = True
+
+
 @pytest.fixture
 def mock_websocket():
-    """Create a mock WebSocket connection"""
-    ws = Mock()
-    ws.send = AsyncMock()
-    ws.recv = AsyncMock()
-    ws.close = AsyncMock()
-    ws.closed = False
-    return ws
+    """Create a fake WebSocket connection"""
+    return FakeWebSocket()
 
 
 @pytest.fixture
@@ -64,41 +149,27 @@ def mock_aiohttp_session():
 
 @pytest.fixture
 def sample_user_data():
-    """Sample user data for testing"""
-    return {
-        "username": "testuser",
-        "password": "testpass123"
-    }
+    """Sample user data for testing (read-only)"""
+    return _SAMPLE_USER_DATA
 
 
 @pytest.fixture
 def sample_token_response():
-    """Sample JWT token response from server"""
-    return {
-        "access_token": "eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9.test.token",
-        "token_type": "bearer",
-        "user_id": 1,
-        "username": "testuser"
-    }
+    """Sample JWT token response from server (read-only)"""
+    return _SAMPLE_TOKEN_RESPONSE
 
 
 @pytest.fixture
 def sample_message():
-    """Sample message data"""
-    return {
-        "type": "message",
-        "content": "Hello, this is a test message!",
-        "username": "testuser",
-        "user_id": 1,
-        "timestamp": "2024-01-01T12:00:00Z"
-    }
+    """Sample message data (read-only)"""
+    return _SAMPLE_MESSAGE
 
 
 @pytest.fixture
-def sample_encrypted_message(encryption_key):
+def sample_encrypted_message(session_encryption_key):
     """Sample encrypted message"""
     plaintext = "Secret message content"
-    encrypted = encryption_key.encrypt(plaintext)
+    encrypted = session_encryption_key.encrypt(plaintext)
     return {
         "plaintext": plaintext,
         "encrypted": encrypted
@@ -107,33 +178,8 @@ def sample_encrypted_message(encryption_key):
 
 @pytest.fixture
 def sample_message_history():
-    """Sample message history from server"""
-    return [
-        {
-            "id": 1,
-            "user_id": 1,
-            "username": "user1",
-            "content": "Message 1",
-            "timestamp": "2024-01-01T12:00:00Z",
-            "room_id": "general"
-        },
-        {
-            "id": 2,
-            "user_id": 2,
-            "username": "user2",
-            "content": "Message 2",
-            "timestamp": "2024-01-01T12:01:00Z",
-            "room_id": "general"
-        },
-        {
-            "id": 3,
-            "user_id": 1,
-            "username": "user1",
-            "content": "Message 3",
-            "timestamp": "2024-01-01T12:02:00Z",
-            "room_id": "general"
-        }
-    ]
+    """Sample message history from server (read-only)"""
+    return _SAMPLE_HISTORY
 
 
 @pytest.fixture
@@ -146,35 +192,32 @@ def mock_textual_app():
 
 
 @pytest.fixture(autouse=True)
-def setup_test_env():
+def setup_test_env(monkeypatch):
     """Set up test environment variables"""
-    original_env = {}
+    monkeypatch.setenv("CHAT_SERVER_URL", "http://localhost:8000")
 
-    # Save original env vars
-    env_vars = ["CHAT_SERVER_URL"]
-    for var in env_vars:
-        original_env[var] = os.environ.get(var)
 
-    # Set test env vars
-    os.environ["CHAT_SERVER_URL"] = "http://localhost:8000"
+@dataclass
+class CallbackRecorder:
+    """
+    Records the arguments passed to each connection event callback
 
-    yield
+    Use record(name) as the callback, then compare the list, e.g.
+    `assert recorder.on_message == [message]`.
+    """
 
-    # Restore original env vars
-    for var, value in original_env.items():
-        if value is None:
-            os.environ.pop(var, None)
-        else:
-            os.environ[var] = value
+    on_message: list = field(default_factory=list)
+    on_status_change: list = field(default_factory=list)
+    on_error: list = field(default_factory=list)
+    on_user_joined: list = field(default_factory=list)
+    on_user_left: list = field(default_factory=list)
+
+    def record(self, name):
+        """Callback that appends its single argument to the named list"""
+        return getattr(self, name).append
 
 
 @pytest.fixture
 def mock_connection_callbacks():
-    """Create mock callbacks for connection events"""
-    return {
-        "on_message": Mock(),
-        "on_status_change": Mock(),
-        "on_error": Mock(),
-        "on_user_joined": Mock(),
-        "on_user_left": Mock()
-    }
+    """Create a recorder for connection event callbacks"""
+    return CallbackRecorder()
@@ -32,11 +32,11 @@ class TestChatConnection:
         assert connection.connected is False
         assert connection.reconnect_delay == 1
         assert connection.max_reconnect_delay == 60
-        assert connection.message_queue == []
+        assert list(connection.message_queue) == []
 
-    async def test_connect_success(self, connection):
+    async def test_connect_success(self, connection, mock_websocket):
         """Test successful WebSocket connection"""
-        mock_ws = AsyncMock()
+        mock_ws = mock_websocket
         status_callback = Mock()
         connection.status_callback = status_callback
 
@@ -65,9 +65,9 @@ class TestChatConnection:
             call_args = status_callback.call_args[0][0]
             assert "connection_failed" in call_args
 
-    async def test_disconnect(self, connection):
+    async def test_disconnect(self, connection, mock_websocket):
         """Test disconnecting from server"""
-        mock_ws = AsyncMock()
+        mock_ws = mock_websocket
         connection.websocket = mock_ws
         connection.connected = True
         connection.running = True
@@ -85,34 +85,34 @@ class TestChatConnection:
 
         assert connection.running is False
         assert connection.connected is False
-        mock_ws.close.assert_called_once()
+        assert mock_ws.closed is True
         status_callback.assert_called_with("disconnected")
 
-    async def test_send_message_when_connected(self, connection):
+    async def test_send_message_when_connected(self, connection, mock_websocket):
         """Test sending message when connected"""
-        mock_ws = AsyncMock()
+        mock_ws = mock_websocket
         connection.websocket = mock_ws
         connection.connected = True
 
         await connection.send_message("Test message")
 
-        mock_ws.send.assert_called_once()
-        call_args = mock_ws.send.call_args[0][0]
+        assert len(mock_ws.sent) == 1
+        call_args = mock_ws.sent[-1]
         sent_data = json.loads(call_args)
 
         assert sent_data["type"] == "message"
         assert sent_data["content"] == "Test message"
         assert sent_data["room_id"] == "general"
 
-    async def test_send_message_with_custom_room(self, connection):
+    async def test_send_message_with_custom_room(self, connection, mock_websocket):
         """Test sending message to custom room"""
-        mock_ws = AsyncMock()
+        mock_ws = mock_websocket
         connection.websocket = mock_ws
         connection.connected = True
 
         await connection.send_message("Test message", room_id="custom_room")
 
-        call_args = mock_ws.send.call_args[0][0]
+        call_args = mock_ws.sent[-1]
         sent_data = json.loads(call_args)
 
         assert sent_data["room_id"] == "custom_room"
@@ -129,10 +129,10 @@ class TestChatConnection:
         assert connection.message_queue[0]["content"] == "Queued message"
         status_callback.assert_called_with("offline_queued")
 
-    async def test_send_message_failure_queues_message(self, connection):
+    async def test_send_message_failure_queues_message(self, connection, mock_websocket):
         """Test that failed send queues the message"""
-        mock_ws = AsyncMock()
-        mock_ws.send.side_effect = Exception("Send failed")
+        mock_ws = mock_websocket
+        mock_ws.send_error = Exception("Send failed")
         connection.websocket = mock_ws
         connection.connected = True
         status_callback = Mock()
@@ -143,47 +143,117 @@ class TestChatConnection:
         assert len(connection.message_queue) == 1
         assert connection.message_queue[0]["content"] == "Failed message"
 
-    async def test_send_queued_messages(self, connection):
+    async def test_send_queued_messages(self, connection, mock_websocket):
         """Test sending queued messages after reconnection"""
-        mock_ws = AsyncMock()
+        mock_ws = mock_websocket
         connection.websocket = mock_ws
         connection.connected = True
 
         # Add messages to queue
-        connection.message_queue = [
+        connection.message_queue.extend([
             {"type": "message", "content": "Message 1"},
             {"type": "message", "content": "Message 2"}
-        ]
+        ])
 
         await connection.send_queued_messages()
 
-        assert mock_ws.send.call_count == 2
+        assert len(mock_ws.sent) == 2
         assert len(connection.message_queue) == 0
 
-    async def test_send_pong(self, connection):
+    async def test_send_queued_messages_keeps_unsent(self, connection, mock_websocket):
+        """Test that messages are kept if sending the queue fails midway"""
+        mock_ws = mock_websocket
+        mock_ws.send_error = Exception("Send failed")
+        mock_ws.fail_after = 1
+        connection.websocket = mock_ws
+        connection.status_callback = Mock()
+
+        connection.message_queue.extend([
+            {"type": "message", "content": "Message 1"},
+            {"type": "message", "content": "Message 2"},
+            {"type": "message", "content": "Message 3"}
+        ])
+
+        await connection.send_queued_messages()
+
+        assert [m["content"] for m in connection.message_queue] == ["Message 2", "Message 3"]
+
+    def test_message_queue_is_bounded(self, connection):
+        """Test that the offline queue drops the oldest messages when full"""
+        for i in range(connection.MAX_QUEUED_MESSAGES + 5):
+            connection.message_queue.append({"type": "message", "content": str(i)})
+
+        assert len(connection.message_queue) == connection.MAX_QUEUED_MESSAGES
+        assert connection.message_queue[0]["content"] == "5"
+
+    async def test_full_queue_reports_dropped_message(self, connection, mock_connection_callbacks):
+        """Test that queueing into a full offline queue is reported"""
+        connection.on_status_change(mock_connection_callbacks.record("on_status_change"))
+        connection.message_queue.extend({"type": "message"} for _ in range(connection.MAX_QUEUED_MESSAGES))
+
+        await connection.send_message("one too many")
+
+        assert mock_connection_callbacks.on_status_change == ["offline_queue_full"]
+        assert connection.message_queue[-1]["content"] == "one too many"
+
+    async def test_send_failure_with_full_queue_reports_drop_last(self, connection, mock_websocket,
+                                                                  mock_connection_callbacks):
+        """Test that the dropped-message notice comes after the send failure"""
+        connection.on_status_change(mock_connection_callbacks.record("on_status_change"))
+        connection.websocket = mock_websocket
+        connection.connected = True
+        mock_websocket.send_error = Exception("Send failed")
+        connection.message_queue.extend({"type": "message"} for _ in range(connection.MAX_QUEUED_MESSAGES))
+
+        await connection.send_message("Test")
+
+        assert mock_connection_callbacks.on_status_change == ["send_failed: Send failed", "offline_queue_full"]
+
+    async def test_requeue_into_refilled_queue_keeps_newest(self, connection, mock_websocket,
+                                                            mock_connection_callbacks):
+        """Test that a failed resend doesn't push out messages queued meanwhile"""
+        connection.on_status_change(mock_connection_callbacks.record("on_status_change"))
+        connection.websocket = mock_websocket
+        connection.message_queue.append({"type": "message", "content": "oldest"})
+
+        async def refill_then_fail(data):
+            # Other messages are queued while the send is in flight
+            while len(connection.message_queue) < connection.MAX_QUEUED_MESSAGES:
+                connection.message_queue.append({"type": "message", "content": "newer"})
+            raise Exception("Send failed")
+
+        mock_websocket.send = refill_then_fail
+
+        await connection.send_queued_messages()
+
+        assert len(connection.message_queue) == connection.MAX_QUEUED_MESSAGES
+        assert all(m["content"] == "newer" for m in connection.message_queue)
+        assert mock_connection_callbacks.on_status_change == ["queue_send_failed: Send failed", "offline_queue_full"]
+
+    async def test_send_pong(self, connection, mock_websocket):
         """Test sending pong response"""
-        mock_ws = AsyncMock()
+        mock_ws = mock_websocket
         connection.websocket = mock_ws
         connection.connected = True
 
         await connection.send_pong()
 
-        mock_ws.send.assert_called_once()
-        call_args = mock_ws.send.call_args[0][0]
+        assert len(mock_ws.sent) == 1
+        call_args = mock_ws.sent[-1]
         sent_data = json.loads(call_args)
 
         assert sent_data["type"] == "pong"
 
-    async def test_send_typing_indicator(self, connection):
+    async def test_send_typing_indicator(self, connection, mock_websocket):
         """Test sending typing indicator"""
-        mock_ws = AsyncMock()
+        mock_ws = mock_websocket
         connection.websocket = mock_ws
         connection.connected = True
 
         await connection.send_typing_indicator(is_typing=True)
 
-        mock_ws.send.assert_called_once()
-        call_args = mock_ws.send.call_args[0][0]
+        assert len(mock_ws.sent) == 1
+        call_args = mock_ws.sent[-1]
         sent_data = json.loads(call_args)
 
         assert sent_data["type"] == "typing"
@@ -205,6 +275,15 @@ class TestChatConnection:
 
         message_callback.assert_called_once_with(test_message)
 
+    async def test_handle_message_accepts_shared_sample(self, connection, sample_message,
+                                                        mock_connection_callbacks):
+        """Test that the read-only sample payload can be fed in without copying"""
+        connection.on_message(mock_connection_callbacks.record("on_message"))
+
+        await connection.handle_message(sample_message)
+
+        assert mock_connection_callbacks.on_message == [sample_message]
+
     async def test_reconnect_delay_increases(self, connection):
         """Test that reconnect delay increases exponentially"""
         initial_delay = connection.reconnect_delay
@@ -227,6 +306,33 @@ class TestChatConnection:
 
         assert connection.reconnect_delay <= connection.max_reconnect_delay
 
+    def test_custom_max_reconnect_delay(self):
+        """Test that the backoff schedule is capped at the configured maximum"""
+        connection = ChatConnection("ws://localhost:8000", 1, "test_token", max_reconnect_delay=10)
+
+        delays = []
+        for _ in range(6):
+            connection.increase_reconnect_delay()
+            delays.append(connection.reconnect_delay)
+
+        assert delays == [2, 4, 8, 10, 10, 10]
+        assert connection.max_reconnect_delay == 10
+
+    @pytest.mark.parametrize("value, expected", [("30", 30), (0, 1), ("junk", 60), (None, 60), (float("inf"), 60)])
+    def test_max_reconnect_delay_is_validated(self, value, expected):
+        """Test that config-supplied delay caps are converted and clamped"""
+        connection = ChatConnection("ws://localhost:8000", 1, "test_token", max_reconnect_delay=value)
+
+        assert connection.max_reconnect_delay == expected
+
+    def test_max_reconnect_delay_can_be_changed(self, connection):
+        """Test that assigning max_reconnect_delay re-caps the schedule"""
+        connection.max_reconnect_delay = 5
+        for _ in range(10):
+            connection.increase_reconnect_delay()
+
+        assert connection.reconnect_delay == 5
+
     def test_set_callbacks(self, connection):
         """Test setting callbacks"""
         message_callback = Mock()
@@ -238,9 +344,9 @@ class TestChatConnection:
         assert connection.message_callback == message_callback
         assert connection.status_callback == status_callback
 
-    async def test_handle_ping_message(self, connection):
+    async def test_handle_ping_message(self, connection, mock_websocket):
         """Test handling ping message from server"""
-        mock_ws = AsyncMock()
+        mock_ws = mock_websocket
         connection.websocket = mock_ws
         connection.connected = True
 
@@ -249,8 +355,8 @@ class TestChatConnection:
         await connection.handle_message(ping_message)
 
         # Should send pong response
-        mock_ws.send.assert_called()
-        call_args = mock_ws.send.call_args[0][0]
+        assert mock_ws.sent
+        call_args = mock_ws.sent[-1]
         sent_data = json.loads(call_args)
         assert sent_data["type"] == "pong"
 
@@ -297,3 +403,17 @@ class TestConnectionReconnection:
         connection.reconnect_delay = 1  # This happens in connect()
 
         assert connection.reconnect_delay == 1
+
+    async def test_connect_resets_backoff_schedule(self, connection, mock_websocket):
+        """Test that connect() restarts the backoff schedule from the beginning"""
+        for _ in range(4):
+            connection.increase_reconnect_delay()
+        assert connection.reconnect_delay == 16
+
+        with patch('websockets.connect', new_callable=AsyncMock, return_value=mock_websocket):
+            with patch.object(connection, 'receive_messages', new_callable=AsyncMock):
+                await connection.connect()
+
+        assert connection.reconnect_delay == 1
+        connection.increase_reconnect_delay()
+        assert connection.reconnect_delay == 2
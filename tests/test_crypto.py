@@ -4,46 +4,63 @@ Unit tests for client-side encryption (same as server, but testing client implem
 
 import pytest
 import os
-from cryptography.fernet import InvalidToken
+import base64
+from pathlib import Path
+from unittest.mock import patch
+from cryptography.fernet import Fernet, InvalidToken
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import padding
 
-from client.crypto import MessageEncryption
+from client.crypto import (
+    CIPHER_AESGCM,
+    ClientEncryption,
+    MessageEncryption,
+    RSAKeyManager,
+)
 
 
 class TestClientEncryption:
     """Tests for client-side message encryption"""
 
-    def test_encrypt_decrypt_roundtrip(self, encryption_key):
+    def test_encrypt_decrypt_roundtrip(self, session_encryption_key):
         """Test encryption and decryption roundtrip"""
         plaintext = "Secret client message"
-        encrypted = encryption_key.encrypt(plaintext)
-        decrypted = encryption_key.decrypt(encrypted)
+        encrypted = session_encryption_key.encrypt(plaintext)
+        decrypted = session_encryption_key.decrypt(encrypted)
 
         assert decrypted == plaintext
 
-    def test_encrypt_produces_different_output(self, encryption_key):
+    def test_encrypt_produces_different_output(self, session_encryption_key):
         """Test that same message encrypts differently each time"""
         plaintext = "Same message"
-        encrypted1 = encryption_key.encrypt(plaintext)
-        encrypted2 = encryption_key.encrypt(plaintext)
+        encrypted1 = session_encryption_key.encrypt(plaintext)
+        encrypted2 = session_encryption_key.encrypt(plaintext)
 
         assert encrypted1 != encrypted2
 
-    def test_decrypt_invalid_data(self, encryption_key):
+    def test_encrypt_many_produces_unique_tokens(self, session_encryption_key):
+        """Test that batch encryption uses a fresh IV per message"""
+        encrypted = session_encryption_key.encrypt_many(["Same message"] * 2)
+
+        assert len(set(encrypted)) == 2
+        assert [session_encryption_key.decrypt(token) for token in encrypted] == ["Same message"] * 2
+
+    def test_decrypt_invalid_data(self, session_encryption_key):
         """Test decrypting invalid data raises error"""
         with pytest.raises(InvalidToken):
-            encryption_key.decrypt("invalid_encrypted_data")
+            session_encryption_key.decrypt("invalid_encrypted_data")
 
-    def test_encrypt_unicode(self, encryption_key):
+    def test_encrypt_unicode(self, session_encryption_key):
         """Test encrypting Unicode characters"""
         plaintext = "🎉 Unicode test 世界 مرحبا"
-        encrypted = encryption_key.encrypt(plaintext)
-        decrypted = encryption_key.decrypt(encrypted)
+        encrypted = session_encryption_key.encrypt(plaintext)
+        decrypted = session_encryption_key.decrypt(encrypted)
 
         assert decrypted == plaintext
 
-    def test_key_persistence_across_instances(self, temp_config_dir):
+    def test_key_persistence_across_instances(self, tmp_path):
         """Test that encryption key persists across instances"""
-        key_path = os.path.join(temp_config_dir, "persistent.key")
+        key_path = str(tmp_path / "persistent.key")
 
         # First instance - generate and save key
         key = MessageEncryption.generate_and_save_key(key_path)
@@ -58,10 +75,10 @@ class TestClientEncryption:
 
         assert decrypted == plaintext
 
-    def test_different_keys_cannot_decrypt(self, temp_config_dir):
+    def test_different_keys_cannot_decrypt(self, tmp_path):
         """Test that different keys cannot decrypt each other's messages"""
-        key_path1 = os.path.join(temp_config_dir, "key1.key")
-        key_path2 = os.path.join(temp_config_dir, "key2.key")
+        key_path1 = str(tmp_path / "key1.key")
+        key_path2 = str(tmp_path / "key2.key")
 
         # Generate two different keys
         key1 = MessageEncryption.generate_and_save_key(key_path1)
@@ -76,9 +93,173 @@ class TestClientEncryption:
         with pytest.raises(InvalidToken):
             enc2.decrypt(encrypted)
 
-    def test_get_key_format(self, encryption_key):
+    def test_get_key_format(self, session_encryption_key):
         """Test that encryption key has correct format"""
-        key = encryption_key.get_key()
+        key = session_encryption_key.get_key()
 
         assert isinstance(key, bytes)
         assert len(key) == 44  # Fernet key base64 encoded
+
+    def test_update_key_rotates_cipher(self):
+        """Test that key rotation replaces the cipher and drops the old key"""
+        key = Fernet.generate_key()
+        enc = MessageEncryption(key=key)
+        other = MessageEncryption(key=key)
+        old_token = enc.encrypt("before")
+        new_key = Fernet.generate_key()
+
+        enc.update_key(new_key)
+
+        assert enc.cipher is not other.cipher
+        assert Fernet(new_key).decrypt(enc.encrypt("rotated").encode()) == b"rotated"
+        with pytest.raises(InvalidToken):
+            enc.decrypt(old_token)
+        assert other.decrypt(old_token) == "before"
+
+
+class TestAESGCMEncryption:
+    """Tests for the negotiated AES-GCM message cipher"""
+
+    def test_roundtrip_with_fernet_session_key(self):
+        """Test that a Fernet-format session key works with AES-GCM"""
+        enc = MessageEncryption(Fernet.generate_key(), CIPHER_AESGCM)
+        plaintext = "🎉 GCM message"
+
+        assert enc.decrypt(enc.encrypt(plaintext)) == plaintext
+
+    def test_encrypt_many_roundtrip(self):
+        """Test that batch AES-GCM encryption roundtrips with unique nonces"""
+        enc = MessageEncryption(algorithm=CIPHER_AESGCM)
+        encrypted = enc.encrypt_many(["one", "two", "two"])
+
+        assert len(set(encrypted)) == 3
+        assert [enc.decrypt(token) for token in encrypted] == ["one", "two", "two"]
+
+    def test_fernet_tokens_rejected(self):
+        """Test that AES-GCM does not accept Fernet tokens"""
+        key = Fernet.generate_key()
+        token = MessageEncryption(key).encrypt("Secret")
+
+        with pytest.raises(InvalidToken):
+            MessageEncryption(key, CIPHER_AESGCM).decrypt(token)
+
+    def test_unknown_cipher_rejected(self):
+        """Test that an unsupported cipher name raises ValueError"""
+        with pytest.raises(ValueError):
+            MessageEncryption(algorithm="rot13")
+
+
+class TestRSAKeyManager:
+    """Tests for RSA key handling"""
+
+    def test_decrypt_with_loaded_key_matches_pem(self):
+        """Test that a pre-loaded key decrypts the same as the PEM path"""
+        private_key = RSAKeyManager.generate_private_key()
+        private_pem, _ = RSAKeyManager.serialize_key_pair(private_key)
+
+        session_key = MessageEncryption().get_key()
+        encrypted = private_key.public_key().encrypt(
+            session_key,
+            padding.OAEP(
+                mgf=padding.MGF1(algorithm=hashes.SHA256()),
+                algorithm=hashes.SHA256(),
+                label=None
+            )
+        )
+
+        assert RSAKeyManager.decrypt_with_loaded_key(private_key, encrypted) == session_key
+        assert RSAKeyManager.decrypt_with_private_key(private_pem, encrypted) == session_key
+
+    def test_get_or_create_caches_public_key(self, tmp_path):
+        """Test that the public key is stored so later loads skip PEM parsing"""
+        with patch.object(Path, 'home', return_value=tmp_path):
+            private_pem, public_pem, private_key = RSAKeyManager.get_or_create_loaded_key_pair()
+            assert private_key is not None
+
+            key_dir = tmp_path / ".terminal-chat"
+            assert (key_dir / "public.key").read_bytes() == public_pem
+
+            with patch.object(RSAKeyManager, 'load_private_key_object') as load_obj:
+                assert RSAKeyManager.get_or_create_loaded_key_pair() == (private_pem, public_pem, None)
+                load_obj.assert_not_called()
+
+    def test_get_or_create_derives_missing_public_key(self, tmp_path):
+        """Test that installs without public.key derive and save it"""
+        with patch.object(Path, 'home', return_value=tmp_path):
+            private_pem, public_pem = RSAKeyManager.get_or_create_key_pair()
+            public_path = tmp_path / ".terminal-chat" / "public.key"
+            public_path.unlink()
+
+            assert RSAKeyManager.get_or_create_key_pair() == (private_pem, public_pem)
+            assert public_path.read_bytes() == public_pem
+
+    def test_get_or_create_rederives_stale_public_key(self, tmp_path):
+        """Test that a public.key older than a replaced private.key is rewritten"""
+        with patch.object(Path, 'home', return_value=tmp_path):
+            RSAKeyManager.get_or_create_key_pair()
+            key_dir = tmp_path / ".terminal-chat"
+            public_path = key_dir / "public.key"
+
+            # Restore a different private key, leaving the old public.key behind
+            other_private_pem, other_public_pem = RSAKeyManager.generate_key_pair()
+            RSAKeyManager.save_private_key(other_private_pem)
+            stat = os.stat(public_path)
+            os.utime(public_path, ns=(stat.st_atime_ns, os.stat(key_dir / "private.key").st_mtime_ns - 1))
+
+            assert RSAKeyManager.get_or_create_key_pair() == (other_private_pem, other_public_pem)
+            assert public_path.read_bytes() == other_public_pem
+
+
+class TestClientSessionKey:
+    """Tests for setting the session key received during key exchange"""
+
+    @staticmethod
+    def encrypt_for(public_pem: bytes, session_key: bytes) -> bytes:
+        """Encrypt a session key the way the server does"""
+        from cryptography.hazmat.primitives import serialization
+
+        public_key = serialization.load_pem_public_key(public_pem)
+        return public_key.encrypt(
+            session_key,
+            padding.OAEP(
+                mgf=padding.MGF1(algorithm=hashes.SHA256()),
+                algorithm=hashes.SHA256(),
+                label=None
+            )
+        )
+
+    def test_unknown_cipher_keeps_previous_session(self, tmp_path):
+        """Test that a rotation to an unsupported cipher leaves the old session intact"""
+        with patch.object(Path, 'home', return_value=tmp_path):
+            client = ClientEncryption()
+            first_key = Fernet.generate_key()
+            client.set_session_key_encrypted(self.encrypt_for(client.public_key, first_key))
+
+            with pytest.raises(ValueError):
+                client.set_session_key_encrypted(
+                    self.encrypt_for(client.public_key, Fernet.generate_key()), "rot13"
+                )
+
+            assert client.session_key == first_key
+            assert client.encryption.get_key() == first_key
+
+    def test_mismatched_public_key_is_rewritten(self, tmp_path):
+        """Test that a public.key not matching private.key is fixed on first use"""
+        with patch.object(Path, 'home', return_value=tmp_path):
+            ClientEncryption()
+            # Restore another private key with an old mtime, as cp -p would
+            private_pem, public_pem = RSAKeyManager.generate_key_pair()
+            private_path = tmp_path / ".terminal-chat" / "private.key"
+            RSAKeyManager.save_private_key(private_pem)
+            os.utime(private_path, ns=(0, 0))
+
+            client = ClientEncryption()
+            assert client.public_key != public_pem
+
+            session_key = Fernet.generate_key()
+            client.set_session_key_encrypted(self.encrypt_for(public_pem, session_key))
+
+            assert client.session_key == session_key
+            assert client.public_key == public_pem
+            assert client.get_public_key_b64() == base64.b64encode(public_pem).decode('ascii')
+            assert (tmp_path / ".terminal-chat" / "public.key").read_bytes() == public_pem
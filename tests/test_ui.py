@@ -0,0 +1,56 @@
+"""
+Unit tests for the client chat UI
+"""
+
+import pytest
+
+from client.ui import ChatApp, _USERNAME_RE
+
+
+class TestUsernameValidation:
+    """Tests for login username validation"""
+
+    @pytest.mark.parametrize("username", ["bob", "user_1", "a-b", "José", "Ünal", "李小龙"])
+    def test_valid_usernames(self, username):
+        """Test that letters (including non-ASCII), digits, _ and - are accepted"""
+        assert _USERNAME_RE.match(username)
+
+    @pytest.mark.parametrize("username", ["ab", "x" * 31, "a b", "bob!", "bob\n"])
+    def test_invalid_usernames(self, username):
+        """Test that bad lengths and other characters are rejected"""
+        assert not _USERNAME_RE.match(username)
+
+
+class TestTypingIndicator:
+    """Tests for ChatScreen typing indicator state"""
+
+    async def test_typing_state_transitions(self):
+        """Test typer counting through 0 -> 1 -> 2 -> 3 -> 2 -> 1 -> 0 typers"""
+        # (username, is_typing, typer count, single typer, indicator text)
+        events = [
+            ("bob", True, 1, "bob", "bob is typing..."),
+            ("bob", True, 1, "bob", "bob is typing..."),  # repeated ping
+            ("amy", True, 2, None, "amy and bob are typing..."),
+            ("zed", True, 3, None, "3 people are typing..."),
+            ("amy", False, 2, None, "bob and zed are typing..."),
+            ("bob", False, 1, "zed", "zed is typing..."),
+            ("amy", False, 1, "zed", "zed is typing..."),  # wasn't typing
+            ("zed", False, 0, None, ""),
+            ("zed", False, 0, None, ""),
+        ]
+
+        app = ChatApp()
+        async with app.run_test() as pilot:
+            app.show_chat("me", 1, "token")
+            await pilot.pause()
+            chat_screen = app.get_chat_screen()
+
+            for username, is_typing, count, single, text in events:
+                chat_screen.update_typing_indicator(username, is_typing)
+
+                assert chat_screen._typer_count == count
+                assert chat_screen._single_typer == single
+                assert chat_screen._last_typing_text == text
+                if count >= 2:
+                    assert len(chat_screen.typing_users) == count
+                assert chat_screen._typing_label.has_class("visible") is bool(text)